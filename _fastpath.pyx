@@ -0,0 +1,94 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Compiled encoders for the binary and compact frames of avolibrary
+
+Build in place with `cythonize -i _fastpath.pyx`. avolibrary uses these when
+the module is importable and falls back to its struct based encoders, which
+produce identical frames, otherwise.
+"""
+from struct import error as struct_error
+from libc.math cimport isinf
+from libc.stdint cimport uint8_t, uint16_t, uint32_t
+from libc.string cimport memcpy
+from cpython.bytes cimport PyBytes_FromStringAndSize
+
+cdef uint16_t CRC_INIT = 0xFFFF # avolibrary.CRC_INIT
+
+cdef inline int _check_u8(int n) except -1:
+  if n < 0 or n > 0xFF: raise struct_error('ubyte format requires 0 <= number <= 255')
+  return 0
+
+cdef inline int _pack_f32(uint8_t *p, double value) except -1:
+  """Little-endian float32, rounding and range checked like struct's '<f'"""
+  cdef float f
+  cdef uint32_t bits
+  f = <float>value
+  if isinf(f) and not isinf(value): raise OverflowError('float too large to pack with f format')
+  memcpy(&bits, &f, 4)
+  p[0] = bits & 0xFF
+  p[1] = (bits >> 8) & 0xFF
+  p[2] = (bits >> 16) & 0xFF
+  p[3] = bits >> 24
+  return 0
+
+cdef uint16_t CRC_TABLE[256]
+
+cdef void _populate_crc_table():
+  """CRC-16-CCITT (polynomial 0x1021) of every single byte, msb first
+
+    The remainder of a power of two byte is the previous one shifted once,
+    and the remainder of any other byte is the xor of those of its bits, so
+    the table is filled with one shift per bit instead of eight per entry.
+  """
+  cdef uint16_t crc = 0x8000
+  cdef int i = 1, j
+  CRC_TABLE[0] = 0
+  while i < 256:
+    crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+    for j in range(i):
+      CRC_TABLE[i + j] = CRC_TABLE[j] ^ crc
+    i <<= 1
+
+_populate_crc_table()
+
+cdef inline uint16_t _crc16_ccitt(const uint8_t *p, Py_ssize_t n) nogil:
+  """CRC-16-CCITT as computed by binascii.crc_hqx, one table lookup per byte"""
+  cdef uint16_t crc = CRC_INIT
+  while n:
+    crc = (crc << 8) ^ CRC_TABLE[(crc >> 8) ^ p[0]]
+    p += 1
+    n -= 1
+  return crc
+
+cdef inline bytes _finish(uint8_t *buf, Py_ssize_t n):
+  """Append the CRC of the first n bytes and return the frame"""
+  cdef uint16_t crc = _crc16_ccitt(buf, n)
+  buf[n] = crc & 0xFF
+  buf[n + 1] = crc >> 8
+  return PyBytes_FromStringAndSize(<char *>buf, n + 2)
+
+def encode_binary(int addr, int msgid, int opcode, double value):
+  """Pack a Protocol.BINARY frame, see avolibrary._encode_binary"""
+  cdef uint8_t buf[10]
+  _check_u8(addr)
+  _check_u8(opcode)
+  if msgid < 0 or msgid > 0xFFFF: raise struct_error('ushort format requires 0 <= number <= 65535')
+  buf[0] = addr
+  buf[1] = msgid & 0xFF
+  buf[2] = msgid >> 8
+  buf[3] = opcode
+  _pack_f32(buf + 4, value)
+  return _finish(buf, 8)
+
+def encode_compact(int addr, int opcode, double value):
+  """Pack a Protocol.COMPACT frame, see avolibrary._encode_compact"""
+  cdef uint8_t buf[8]
+  _check_u8(addr)
+  _check_u8(opcode)
+  if 0 < addr < 16:
+    buf[0] = addr << 4 | opcode
+    _pack_f32(buf + 1, value)
+    return _finish(buf, 5)
+  buf[0] = opcode
+  buf[1] = addr
+  _pack_f32(buf + 2, value)
+  return _finish(buf, 6)
@@ -1,9 +1,46 @@
-from math import radians
+from math import pi, radians
 from enum import Enum
-from typing import Any
-import serial, time, sys
+from binascii import crc_hqx
+from collections import deque
+from concurrent.futures import Future
+from contextlib import contextmanager
+from typing import Any, Callable, ClassVar, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+import serial, os, struct, threading, time, sys
 
 STOP_BYTE = '\0'
+DEFAULT_BAUDRATE = 921600 # the MCU firmware must be configured for the same rate
+BAUDRATES = (3000000, 2000000, 1000000, 921600, 460800, 230400, 115200) # tried by negotiate_baudrate(), highest first
+LATENCY_TIMER_MS = 1 # USB-serial receive latency, kernel default is 16ms
+MAX_RESPONSE_LEN = 128 # upper bound on a single MCU response, stop byte included
+
+# Pre-encoded command verbs. Setters are followed by a value, getters are
+# complete frames including the stop byte.
+SET_POS = b'set pos '
+SET_VEL = b'set vel '
+SET_CUR = b'set cur '
+GET_POS = b'get pos\0'
+GET_VEL = b'get vel\0'
+GET_CUR = b'get cur\0'
+GET_TMP = b'get tmp\0'
+
+# Opcodes used by the binary protocols, bit 3 marks a read. Kept below 16 so
+# they fit the 4 bit opcode field of compact frames.
+OPCODES = {
+  SET_POS: 0x01,
+  SET_VEL: 0x02,
+  SET_CUR: 0x03,
+  GET_POS: 0x09,
+  GET_VEL: 0x0A,
+  GET_CUR: 0x0B,
+  GET_TMP: 0x0C,
+}
+BINARY_HEADER = struct.Struct('<BHBf') # addr, msgid, opcode, value
+BINARY_CRC = struct.Struct('<H')
+# Frames are checked with CRC-16-CCITT (binascii.crc_hqx, implemented in C)
+# rather than zlib.crc32 so the firmware can use the standard CCITT table.
+CRC_INIT = 0xFFFF
+COMPACT_HEADER = struct.Struct('<Bf') # addr << 4 | opcode, value
+COMPACT_WIDE_HEADER = struct.Struct('<BBf') # opcode (addr nibble 0), addr, value
 
 class PosUnit(Enum):
   RADIANS = 1 # prefer radians based on project specifications
@@ -13,40 +50,344 @@ class VelUnit(Enum):
   RPS = 1 # radians per second - prefer radians based on project specifications
   RPM = 2 # rotations per minute
 
-class Communicator:
-  """Provides abstractions for communication with an arbitrary number of actuators
+class Protocol(Enum):
+  TEXT = 1 # ascii '<addr> <verb> <value>' frames understood by all firmware
+  BINARY = 2 # fixed 10 byte frames: uint8 addr | uint16 msgid | uint8 opcode | float32 value | uint16 crc
+  COMPACT = 3 # 7 byte frames for addr 1-15: uint8 addr << 4 | opcode | float32 value | uint16 crc
+
+def _encode_binary(addr: int, msgid: int, opcode: int, value: float) -> bytes:
+  """Pack a Protocol.BINARY frame"""
+  frame = BINARY_HEADER.pack(addr, msgid, opcode, value)
+  return frame + BINARY_CRC.pack(crc_hqx(frame, CRC_INIT))
+
+def _encode_compact(addr: int, opcode: int, value: float) -> bytes:
+  """Pack a Protocol.COMPACT frame, two byte header outside addresses 1-15"""
+  if 0 < addr < 16:
+    frame = COMPACT_HEADER.pack(addr << 4 | opcode, value)
+  else:
+    frame = COMPACT_WIDE_HEADER.pack(opcode, addr, value)
+  return frame + BINARY_CRC.pack(crc_hqx(frame, CRC_INIT))
+
+def _pack_crc_into(buf: memoryview, n: int) -> int:
+  """Write the CRC of the n bytes packed into buf behind them, returns the frame length"""
+  BINARY_CRC.pack_into(buf, n, crc_hqx(buf[:n], CRC_INIT))
+  return n + BINARY_CRC.size
+
+try:
+  # compiled versions of the two encoders above, see _fastpath.pyx
+  from _fastpath import encode_binary as _encode_binary, encode_compact as _encode_compact
+except ImportError:
+  pass
+
+class _FrameCodec:
+  """Encodes commands for and decodes responses from the MCU
+
+    Shared by the synchronous and asyncio communicators, which only differ in
+    how frames get on and off the wire.
 
     Attributes:
-      port_num: specifies serial port used for communication. On *NIX this looks
-        like '/dev/ttyACM0', on Windows like 'COM3'
       pos_unit: unit for position
       vel_unit: unit for velocity
-      ser: Serial object for communication (timeout arbitrarily set to 0.01s)
+      protocol: wire format used for commands, must match the MCU firmware
+      _prefixes: constant encoded command parts per registered actuator, see
+        register()
+      _msgid: id of the last binary frame handed out by _next_msgid()
+      _encode_frame: serializes a message for the MCU in the configured
+        protocol, one of the _encode_*_frame methods
+      _encode_frame_into: the same into a writable buffer, one of the
+        _encode_*_frame_into methods
   """
-  def __init__(self, port_num: str, pos_unit: PosUnit = PosUnit.RADIANS, vel_unit: VelUnit = VelUnit.RPS) -> None:
+  __slots__ = ('pos_unit', 'vel_unit', 'protocol', '_convert_pos', '_convert_vel', '_prefixes', '_encode_frame', '_encode_frame_into', '_msgid')
+
+  def __init__(self, pos_unit: PosUnit = PosUnit.RADIANS, vel_unit: VelUnit = VelUnit.RPS, protocol: Protocol = Protocol.TEXT) -> None:
     """Constructor simply setting attributes"""
-    self.port_num: str = port_num
     self.pos_unit: PosUnit = pos_unit
     self.vel_unit: VelUnit = vel_unit
-    self.ser: serial.Serial = serial.Serial(port_num, 115200, timeout=0.05)
+    self.protocol: Protocol = protocol
+    # The MCU only supports radians, so user provided units are converted
+    # before sending. The units are fixed, so pick the conversion once here.
+    self._convert_pos = (lambda pos: pos) if pos_unit == PosUnit.RADIANS else radians
+    self._convert_vel = (lambda vel: vel) if vel_unit == VelUnit.RPS else (lambda vel: vel * (pi / 30))
+    self._prefixes: Dict[int, Dict[bytes, bytes]] = {}
+    # The protocol is fixed as well, so frames are encoded by the matching
+    # method instead of dispatching on it per call.
+    self._encode_frame: Callable[..., bytes] = {
+      Protocol.TEXT: self._encode_text_frame,
+      Protocol.BINARY: self._encode_binary_frame,
+      Protocol.COMPACT: self._encode_compact_frame,
+    }[protocol]
+    self._encode_frame_into: Callable[..., int] = {
+      Protocol.TEXT: self._encode_text_frame_into,
+      Protocol.BINARY: self._encode_binary_frame_into,
+      Protocol.COMPACT: self._encode_compact_frame_into,
+    }[protocol]
+    self._msgid: int = 0
+
+  def register(self, addr: int) -> Dict[bytes, bytes]:
+    """Precompute the constant encoded commands of an actuator
+
+      Calling this up front is optional, actuators are registered on their
+      first command otherwise.
+
+      Args:
+        addr: actuator id
+
+      Returns:
+        under Protocol.TEXT the encoded '<addr> <verb>' prefix of every command
+        verb, under Protocol.COMPACT the complete frame of every getter verb,
+        nothing under Protocol.BINARY where every frame carries a new msgid
+    """
+    if self.protocol == Protocol.BINARY:
+      prefixes: Dict[bytes, bytes] = {}
+    elif self.protocol == Protocol.COMPACT:
+      # getters carry no value or message id, so their whole frame is constant
+      prefixes = {verb: _encode_compact(addr, op, 0.0) for verb, op in OPCODES.items() if op & 0x08}
+    else:
+      head = b'%d ' % addr
+      prefixes = {verb: head + verb for verb in OPCODES}
+    self._prefixes[addr] = prefixes
+    return prefixes
+
+  def _next_msgid(self) -> int:
+    """Returns a new id for a binary frame, wrapping at 16 bits"""
+    self._msgid = (self._msgid + 1) & 0xFFFF
+    return self._msgid
+
+  def _encode_text_frame(self, addr: int, verb: bytes, value: Optional[float] = None, msgid: int = 0) -> bytes:
+    """Serialize a message for the MCU as Protocol.TEXT
+
+      Getter frames are fully cached, setters only format their value.
+
+      Args:
+        addr: actuator id
+        verb: one of the pre-encoded command verbs (SET_POS, GET_VEL, ...)
+        value: value for setter verbs, None for getters
+        msgid: id echoed back by the MCU, only sent in binary frames
+
+      Returns:
+        the encoded frame
+    """
+    prefix = (self._prefixes.get(addr) or self.register(addr))[verb]
+    return prefix if value is None else b'%b%a\0' % (prefix, float(value))
+
+  def _encode_binary_frame(self, addr: int, verb: bytes, value: Optional[float] = None, msgid: int = 0) -> bytes:
+    """Serialize a message for the MCU as Protocol.BINARY, see _encode_text_frame
+
+      The frame ends in a CRC-16-CCITT over the preceding bytes.
+    """
+    return _encode_binary(addr, msgid, OPCODES[verb], 0.0 if value is None else value)
+
+  def _encode_compact_frame(self, addr: int, verb: bytes, value: Optional[float] = None, msgid: int = 0) -> bytes:
+    """Serialize a message for the MCU as Protocol.COMPACT, see _encode_text_frame
+
+      Getter frames are fully cached. Like binary frames, the frame ends in a
+      CRC-16-CCITT, with a two byte header for addresses outside 1-15.
+    """
+    if value is None: return (self._prefixes.get(addr) or self.register(addr))[verb]
+    return _encode_compact(addr, OPCODES[verb], value)
+
+  def _encode_text_frame_into(self, buf: memoryview, addr: int, verb: bytes, value: Optional[float] = None, msgid: int = 0) -> int:
+    """Serialize a message for the MCU into the start of a writable buffer
+
+      Text frames are encoded as usual and copied, binary and compact frames
+      are packed in place without allocating. See _encode_text_frame for the
+      arguments.
+
+      Returns:
+        the length of the encoded frame
+    """
+    frame = self._encode_text_frame(addr, verb, value, msgid)
+    buf[:len(frame)] = frame
+    return len(frame)
+
+  def _encode_binary_frame_into(self, buf: memoryview, addr: int, verb: bytes, value: Optional[float] = None, msgid: int = 0) -> int:
+    """Pack a Protocol.BINARY frame into buf, see _encode_text_frame_into"""
+    BINARY_HEADER.pack_into(buf, 0, addr, msgid, OPCODES[verb], 0.0 if value is None else value)
+    return _pack_crc_into(buf, BINARY_HEADER.size)
+
+  def _encode_compact_frame_into(self, buf: memoryview, addr: int, verb: bytes, value: Optional[float] = None, msgid: int = 0) -> int:
+    """Pack a Protocol.COMPACT frame into buf, see _encode_text_frame_into"""
+    value = 0.0 if value is None else value
+    if 0 < addr < 16:
+      COMPACT_HEADER.pack_into(buf, 0, addr << 4 | OPCODES[verb], value)
+      return _pack_crc_into(buf, COMPACT_HEADER.size)
+    COMPACT_WIDE_HEADER.pack_into(buf, 0, OPCODES[verb], addr, value)
+    return _pack_crc_into(buf, COMPACT_WIDE_HEADER.size)
+
+  def _decode_response(self, frame: bytes) -> Tuple[Optional[int], str]:
+    """Parse a stop byte terminated response of the MCU
+
+      Under the binary protocol the MCU prefixes its response with the
+      message id of the command it answers, '<msgid> <response>'.
 
-  def __del__(self) -> None:
+      Args:
+        frame: the raw response, the stop byte is missing if it timed out
+
+      Returns:
+        the message id (None for the text protocol) and the response text
+        without the stop byte
+    """
+    # frames are split at their first stop byte, so it can only be the last byte
+    text = (frame[:-1] if frame[-1:] == b'\0' else frame).decode("utf-8")
+    if self.protocol != Protocol.BINARY: return None, text
+
+    msgid, _, text = text.partition(' ')
+    return int(msgid), text
+
+class Communicator(_FrameCodec):
+  """Provides abstractions for communication with an arbitrary number of actuators
+
+    Use as a context manager or call close() when done; the port is not closed
+    by a finalizer, which may run late or not at all on interpreter shutdown.
+
+    Attributes:
+      port_num: specifies serial port used for communication. On *NIX this looks
+        like '/dev/ttyACM0', on Windows like 'COM3'
+      baudrate: serial baudrate, must match the MCU firmware. Pass None to
+        the constructor to open the port at DEFAULT_BAUDRATE and pick the
+        rate with negotiate_baudrate()
+      ser: Serial object for communication (timeout set to 0.02s, the expected MCU response budget)
+      _rx_buf: received bytes not yet returned, may hold partial frames
+      _tx_batch: encoded frames queued by batch(), sent by flush()
+      _batch_msgids: message ids of the frames in _tx_batch
+      _actuators: handles handed out by actuator(), by address
+
+    See _FrameCodec for the unit and protocol attributes.
+  """
+  __slots__ = ('port_num', 'baudrate', 'ser', '_rx_buf', '_tx_batch', '_batch_msgids', '_queued', '_batching', '_actuators')
+  _instances: ClassVar[Dict[str, 'Communicator']] = {} # shared instances handed out by get()
+
+  def __init__(self, port_num: str, pos_unit: PosUnit = PosUnit.RADIANS, vel_unit: VelUnit = VelUnit.RPS, protocol: Protocol = Protocol.TEXT, baudrate: Optional[int] = DEFAULT_BAUDRATE) -> None:
+    """Constructor simply setting attributes"""
+    super().__init__(pos_unit, vel_unit, protocol)
+    self.port_num: str = port_num
+    # negotiation opens the port at the default rate and only then tries higher ones
+    self.baudrate: int = DEFAULT_BAUDRATE if baudrate is None else baudrate
+    self.ser: serial.Serial = serial.Serial(port_num, self.baudrate, timeout=0.02)
+    self._rx_buf: bytearray = bytearray()
+    self._tx_batch: bytearray = bytearray()
+    self._batch_msgids: List[int] = []
+    self._queued: int = 0
+    self._batching: bool = False
+    self._actuators: Dict[int, 'Actuator'] = {}
+    self._tune_latency()
+    if baudrate is None:
+      try:
+        self.negotiate_baudrate()
+      except BaseException:
+        self.ser.close()
+        raise
+
+  def __enter__(self) -> 'Communicator':
+    return self
+
+  def __exit__(self, *exc: Any) -> None:
+    self.close()
+
+  @classmethod
+  def get(cls, port_num: str, **kwargs: Any) -> 'Communicator':
+    """Returns the shared communicator of a port, opening it on first use
+
+      Lets independent parts of a program talk over the same port without
+      each paying for (and contending over) opening it. The instance stays
+      open until close() is called on it.
+
+      Args:
+        port_num: serial port, see Communicator
+        kwargs: remaining constructor arguments, only used when opening
+
+      Returns:
+        the communicator for port_num
+    """
+    comm = Communicator._instances.get(port_num)
+    if comm is None:
+      comm = Communicator._instances[port_num] = cls(port_num, **kwargs)
+    elif type(comm) is not cls:
+      raise ValueError(f'{port_num} is already open as {type(comm).__name__}')
+    return comm
+
+  def close(self) -> None:
+    """Close the serial port, removing the instance from the get() pool"""
+    if Communicator._instances.get(self.port_num) is self: del Communicator._instances[self.port_num]
     self.ser.close()
 
-  def _convert_pos_to_radians(self, pos: float) -> float:
-    """Convert a given position to radians if it is not already
+  def _tune_latency(self) -> None:
+    """Lower the USB-serial latency timer of the port
+
+      FTDI style adapters hold received bytes for up to latency_timer ms before
+      handing them to the OS, which dominates the round trip of short
+      messages. Linux exposes the timer in sysfs; on other platforms, for
+      adapters without a timer (e.g. CDC-ACM) or without write permission this
+      is a no-op.
+    """
+    if not sys.platform.startswith('linux'): return
+
+    tty = os.path.basename(os.path.realpath(self.port_num))
+    try:
+      with open(f'/sys/bus/usb-serial/devices/{tty}/latency_timer', 'wb') as f:
+        f.write(b'%d' % LATENCY_TIMER_MS)
+    except OSError:
+      pass
 
-      Allows users to specify multiple units but simplify MCU communications by
-      supporting a single unit on the MCU and converting user provided units to
-      that unit. Choosing radians based on user specifications.
+  def actuator(self, addr: int) -> 'Actuator':
+    """Returns the handle of an actuator, registering it on first use
 
       Args:
-        pos: position specified in self.pos_unit units
+        addr: actuator id
+
+      Returns:
+        the handle for addr, the same object on every call
+    """
+    handle = self._actuators.get(addr)
+    if handle is None:
+      self.register(addr)
+      handle = self._actuators[addr] = Actuator(self, addr)
+    return handle
+
+  def negotiate_baudrate(self, addr: int = 1, rates: Tuple[int, ...] = BAUDRATES) -> int:
+    """Switch the port to the highest baudrate the MCU answers at
+
+      Each rate is probed with a temperature read of actuator addr and kept if
+      both that and a second, confirming read get a non-empty numeric reply
+      (carrying the sent message id under Protocol.BINARY). Framing errors at
+      a mismatched rate arrive as NUL bytes, so merely receiving a stop byte
+      proves nothing. Raw pyserial I/O is used so this also works before a
+      subclass finished setting up. A running PipelinedCommunicator reads the
+      port itself, pass baudrate=None to its constructor instead.
+
+      Args:
+        addr: id of an actuator connected to the MCU
+        rates: candidate baudrates, in order of preference
 
       Returns:
-        position converted to radians
+        the selected baudrate, also stored in self.baudrate
     """
-    return pos if self.pos_unit == PosUnit.RADIANS else radians(pos)
+    for rate in rates:
+      try:
+        self.ser.baudrate = rate
+      except (ValueError, serial.SerialException): # rate not supported by the adapter
+        continue
+      self.ser.reset_input_buffer()
+      self._rx_buf.clear()
+      if self._probe(addr) and self._probe(addr):
+        self.baudrate = rate
+        return rate
+
+    self.ser.baudrate = self.baudrate
+    raise ConnectionError(f'no response from actuator {addr} on {self.port_num} at any of {rates} baud')
+
+  def _probe(self, addr: int) -> bool:
+    """Returns whether a temperature read of addr gets a well formed reply"""
+    msgid = self._next_msgid()
+    self.ser.write(self._encode_frame(addr, GET_TMP, None, msgid))
+    frame = self.ser.read_until(STOP_BYTE.encode(), MAX_RESPONSE_LEN)
+    if frame[-1:] != b'\0': return False
+    try:
+      reply_id, text = self._decode_response(frame)
+      float(text)
+    except ValueError: # garbage received at the wrong rate
+      return False
+    return reply_id is None or reply_id == msgid
 
   def rotate_to_position(self, addr: int, pos: float) -> str:
     """Rotates actuator given by addr to postion given by pos
@@ -61,8 +402,7 @@ class Communicator:
       TODO:
         - Allow user to specify timing/speed on rotation?
     """
-    self._send_to_mcu(addr, f'set pos {pos}')
-    return self._read_from_mcu()
+    return self._command(addr, SET_POS, self._convert_pos(pos))
 
   def rotate_at_velocity(self, addr: int, vel: float) -> str:
     """Rotates actuator given by addr at velocity given by vel
@@ -77,8 +417,7 @@ class Communicator:
       TODO:
         - Allow user to specify how long they would like rotation to occur for?
     """
-    self._send_to_mcu(addr, f'set vel {vel}')
-    return self._read_from_mcu()
+    return self._command(addr, SET_VEL, self._convert_vel(vel))
 
   def rotate_at_current(self, addr: int, cur: float) -> str:
     """Rotates actuator given by addr at current given by cur
@@ -90,8 +429,7 @@ class Communicator:
       Returns:
         the response of the mcu
     """
-    self._send_to_mcu(addr, f'set cur {cur}')
-    return self._read_from_mcu()
+    return self._command(addr, SET_CUR, cur)
 
   def get_position(self, addr: int) -> str:
     """Returns the current position the actuator is at
@@ -102,8 +440,7 @@ class Communicator:
       Returns:
         the response of the mcu
     """
-    self._send_to_mcu(addr, 'get pos')
-    return self._read_from_mcu()
+    return self._command(addr, GET_POS)
 
   def get_velocity(self, addr: int) -> str:
     """Returns the current velocity the actuator is rotating at
@@ -114,8 +451,7 @@ class Communicator:
       Returns:
         the response of the mcu
     """
-    self._send_to_mcu(addr, 'get vel')
-    return self._read_from_mcu()
+    return self._command(addr, GET_VEL)
 
   def get_current(self, addr: int) -> str:
     """Returns the current the actuator is operating at
@@ -126,8 +462,7 @@ class Communicator:
       Returns:
         the response of the mcu
     """
-    self._send_to_mcu(addr, 'get cur')
-    return self._read_from_mcu()
+    return self._command(addr, GET_CUR)
 
   def get_temperature(self, addr: int) -> str:
     """Returns the temperature the actuator is operating at
@@ -138,32 +473,384 @@ class Communicator:
       Returns:
         the response of the mcu
     """
-    self._send_to_mcu(addr, 'get tmp')
-    return self._read_from_mcu()
+    return self._command(addr, GET_TMP)
 
-  def _send_to_mcu(self, addr: int, message: str) -> None:
-    """Serialize and send a message to MCU
+  @contextmanager
+  def batch(self) -> Iterator[List[str]]:
+    """Group the commands issued inside a with block into a single write
+
+      While the block runs, the rotate_* and get_* methods queue their frame and
+      return None instead of waiting for a response. On exit all queued frames
+      are sent at once and the responses are collected. send_batch() does the
+      same for a list of (addr, verb, value) commands.
+
+      Example:
+        with comm.batch() as responses:
+          comm.rotate_at_velocity(1, 10.0)
+          comm.rotate_at_velocity(2, 10.0)
+        print(responses)
+
+      Yields:
+        list filled with the responses of the mcu once the block exits
+    """
+    responses: List[str] = []
+    self._batching = True
+    try:
+      yield responses
+    except BaseException:
+      self._discard_batch()
+      raise
+    finally:
+      self._batching = False
+    responses.extend(self.flush())
+
+  def _discard_batch(self) -> None:
+    """Drop all queued frames without sending them"""
+    self._tx_batch.clear()
+    self._batch_msgids.clear()
+    self._queued = 0
+
+  def flush(self) -> List[str]:
+    """Send all queued frames with one write and read their responses
+
+      Returns:
+        the responses of the mcu, in the order the commands were queued
+    """
+    n = self._queued
+    if not n: return []
+
+    msgids = self._batch_msgids[:]
+    try:
+      self._write(self._tx_batch)
+    finally:
+      self._discard_batch()
+    if self.protocol != Protocol.BINARY: return [self._read_from_mcu() for _ in range(n)]
+
+    # binary responses carry the id of their command and may arrive in any order
+    replies: Dict[int, str] = {}
+    while len(replies) < n:
+      line = self._read_frame()
+      if not line: break
+      msgid, text = self._decode_response(line)
+      if msgid in msgids: replies[msgid] = text
+    return [replies.get(msgid, '') for msgid in msgids]
+
+  def send_batch(self, commands: Iterable[Tuple[int, bytes, Optional[float]]]) -> List[str]:
+    """Send several commands with a single write and collect their responses
+
+      Args:
+        commands: (addr, verb, value) per command, where verb is one of the
+          command verbs (SET_POS, GET_VEL, ...) and value is given in the
+          units of this communicator, None for getters
+
+      Returns:
+        the responses of the mcu, in the order of commands
+    """
+    with self.batch() as responses:
+      for addr, verb, value in commands:
+        if verb not in OPCODES: raise ValueError(f'unknown command verb {verb!r}')
+        is_getter = bool(OPCODES[verb] & 0x08)
+        if is_getter != (value is None):
+          raise ValueError(f"'{verb.decode().strip(' ' + STOP_BYTE)}' takes {'no' if is_getter else 'a'} value")
+        if verb == SET_POS: value = self._convert_pos(value)
+        elif verb == SET_VEL: value = self._convert_vel(value)
+        self._command(addr, verb, value)
+    return responses
+
+  def rotate_many(self, positions: Dict[int, float]) -> List[str]:
+    """Rotates several actuators to their positions with a single write
+
+      Args:
+        positions: position in self.pos_unit units by actuator id
+
+      Returns:
+        the responses of the mcu, in the order of positions
+    """
+    return self.send_batch((addr, SET_POS, pos) for addr, pos in positions.items())
+
+  def _command(self, addr: int, verb: bytes, value: Optional[float] = None) -> Optional[str]:
+    """Send a command and wait for its response, or queue it while batching
 
       Args:
         addr: actuator id
-        message: user message to send
+        verb: one of the pre-encoded command verbs (SET_POS, GET_VEL, ...)
+        value: value for setter verbs, None for getters
 
       Returns:
-        true for success
+        the response of the mcu, None while batching
+    """
+    msgid = self._next_msgid() if self.protocol == Protocol.BINARY else 0
+    if self._batching:
+      self._tx_batch += self._encode_frame(addr, verb, value, msgid)
+      self._batch_msgids.append(msgid)
+      self._queued += 1
+      return None
+
+    self._send_to_mcu(addr, verb, value, msgid)
+    return self._read_from_mcu(msgid)
+
+  def _send_to_mcu(self, addr: int, verb: bytes, value: Optional[float] = None, msgid: int = 0) -> None:
+    """Serialize and send a message to MCU
+
+      Args:
+        addr: actuator id
+        verb: one of the pre-encoded command verbs (SET_POS, GET_VEL, ...)
+        value: value for setter verbs, None for getters
+        msgid: id echoed back by the MCU, only sent in binary frames
     """
-    cmd = f'{addr} {message}{STOP_BYTE}'
-    self.ser.write(cmd.encode('utf-8'))
+    self._write(self._encode_frame(addr, verb, value, msgid))
+
+  def _write(self, data: bytes) -> None:
+    """Write raw bytes to the serial port"""
+    # pass bytes: pyserial copies bytearray/memoryview input to bytes anyway
+    self.ser.write(data)
+
+  def _read_available(self) -> bytes:
+    """Read whatever the OS has buffered, waiting up to the timeout for a byte"""
+    return self.ser.read(self.ser.in_waiting or 1)
 
-  def _read_from_mcu(self) -> str:
+  def _read_from_mcu(self, msgid: Optional[int] = None) -> str:
     """Receive messages from MCU
 
+      Returns as soon as the stop byte arrives instead of waiting out the
+      serial timeout. Under Protocol.BINARY responses carrying another message
+      id, i.e. late responses to commands that timed out, are skipped.
+
+      Args:
+        msgid: id of the command to read the response of, None for any
+
       Returns:
-        the contents of the receive buffer
+        the next message in the receive buffer, '' if nothing arrived
     """
-    lines = self.ser.readlines()
-    if(len(lines) > 1): raise ValueError("Multiline buffer returned")
+    while True:
+      line = self._read_frame()
+      if not line: return ''
+      reply_id, text = self._decode_response(line)
+      if reply_id is None or msgid is None or reply_id == msgid: return text
+
+  def _read_frame(self, partial: bool = True) -> bytes:
+    """Pop the next stop byte terminated frame off the receive buffer
 
-    return lines[0].decode("utf-8").replace(STOP_BYTE, ' ') if lines else []
+      Everything the OS has buffered is drained with a single read, only
+      blocking (for at most the serial timeout) while no complete frame has
+      arrived. Bytes following the frame are kept for the next call.
+
+      Args:
+        partial: return an incomplete frame on timeout instead of keeping it
+          buffered for the next call
+
+      Returns:
+        the frame including its stop byte, whatever arrived before the
+        timeout if incomplete, or b'' if nothing arrived
+    """
+    buf = self._rx_buf
+    end = buf.find(0)
+    while end < 0 and len(buf) < MAX_RESPONSE_LEN:
+      data = self._read_available()
+      if not data: break
+      start = len(buf)
+      buf += data
+      end = buf.find(0, start)
+
+    if end < 0 and not partial and len(buf) < MAX_RESPONSE_LEN: return b''
+    n = end + 1 if end >= 0 else min(len(buf), MAX_RESPONSE_LEN)
+    frame = bytes(buf[:n])
+    del buf[:n]
+    return frame
+
+class PipelinedCommunicator(Communicator):
+  """Communicator that keeps several commands in flight at once
+
+    The rotate_* and get_* methods return a concurrent.futures.Future right
+    after writing their frame instead of waiting for the response. A background
+    thread reads all responses and resolves the future of the command each one
+    answers: by message id under Protocol.BINARY, by order under Protocol.TEXT.
+    Inside batch() the yielded list holds these futures.
+
+    Call close() when done, the reader thread keeps the instance alive.
+
+    Attributes:
+      _pending: futures of commands awaiting a response, by message id
+      _in_order: futures of commands awaiting a response, in send order
+      _batch_futures: futures of the commands queued by batch()
+      _lock: serializes registering a future with writing its frame
+      _reader: thread resolving the futures
+  """
+  __slots__ = ('_pending', '_in_order', '_batch_futures', '_lock', '_running', '_reader')
+
+  def __init__(self, port_num: str, pos_unit: PosUnit = PosUnit.RADIANS, vel_unit: VelUnit = VelUnit.RPS, protocol: Protocol = Protocol.TEXT, baudrate: Optional[int] = DEFAULT_BAUDRATE) -> None:
+    """Constructor setting attributes and starting the reader thread"""
+    super().__init__(port_num, pos_unit, vel_unit, protocol, baudrate)
+    self._pending: Dict[int, Future] = {}
+    self._in_order: Deque[Future] = deque()
+    self._batch_futures: List[Future] = []
+    self._lock: threading.Lock = threading.Lock()
+    self._running: bool = True
+    self._reader: threading.Thread = threading.Thread(target=self._read_responses, daemon=True)
+    self._reader.start()
+
+  def close(self) -> None:
+    """Stop the reader thread, fail outstanding commands and close the port"""
+    self._running = False
+    self._reader.join()
+    self._fail_pending(ConnectionError('communicator closed'))
+    super().close()
+
+  def flush(self) -> List[Future]:
+    """Send all queued frames with one write
+
+      Returns:
+        the futures of the queued commands, in the order they were queued
+    """
+    with self._lock:
+      futures, self._batch_futures = self._batch_futures, []
+      if self._queued:
+        try:
+          self._write(self._tx_batch)
+        except BaseException:
+          self._cancel(futures)
+          raise
+        finally:
+          super()._discard_batch()
+    return futures
+
+  def _discard_batch(self) -> None:
+    """Drop all queued frames and cancel their futures"""
+    with self._lock:
+      super()._discard_batch()
+      self._cancel(self._batch_futures)
+      self._batch_futures = []
+
+  def _cancel(self, futures: List[Future]) -> None:
+    """Cancel futures of unsent commands and stop matching responses to them"""
+    for fut in futures:
+      fut.cancel()
+      if fut in self._in_order: self._in_order.remove(fut)
+    self._pending = {msgid: fut for msgid, fut in self._pending.items() if not fut.cancelled()}
+
+  def _command(self, addr: int, verb: bytes, value: Optional[float] = None) -> Future:
+    """Send (or queue while batching) a command without waiting for its response
+
+      Args:
+        addr: actuator id
+        verb: one of the pre-encoded command verbs (SET_POS, GET_VEL, ...)
+        value: value for setter verbs, None for getters
+
+      Returns:
+        future resolved with the response of the mcu
+    """
+    if not self._reader.is_alive(): raise ConnectionError('communicator closed')
+
+    fut: Future = Future()
+    with self._lock:
+      msgid = self._next_msgid() if self.protocol == Protocol.BINARY else 0
+      frame = self._encode_frame(addr, verb, value, msgid)
+      if self.protocol == Protocol.BINARY:
+        self._pending[msgid] = fut
+      else:
+        self._in_order.append(fut)
+
+      if self._batching:
+        self._tx_batch += frame
+        self._queued += 1
+        self._batch_futures.append(fut)
+        return fut
+
+      try:
+        self._write(frame)
+      except BaseException:
+        # the frame did not (fully) go out, so no response will answer fut
+        if self.protocol == Protocol.BINARY: del self._pending[msgid]
+        else: self._in_order.pop()
+        raise
+    return fut
+
+  def _read_responses(self) -> None:
+    """Resolve the future of every command the MCU responds to
+
+      Runs on the reader thread until close(). Responses to cancelled commands
+      are dropped. An undecodable frame is dropped under Protocol.BINARY, where
+      it cannot be matched to a command, and otherwise fails the command it
+      answers so later responses still reach the right command.
+    """
+    while self._running:
+      try:
+        frame = self._read_frame(partial=False)
+      except serial.SerialException as exc:
+        self._fail_pending(exc)
+        return
+      if not frame.endswith(b'\0'): continue
+
+      try:
+        msgid, response = self._decode_response(frame)
+      except ValueError as exc:
+        if self.protocol == Protocol.BINARY: continue
+        msgid, response = None, exc
+      with self._lock:
+        if msgid is None:
+          fut = self._in_order.popleft() if self._in_order else None
+        else:
+          fut = self._pending.pop(msgid, None)
+      if fut is None or not fut.set_running_or_notify_cancel(): continue
+      if isinstance(response, Exception): fut.set_exception(response)
+      else: fut.set_result(response)
+
+  def _fail_pending(self, exc: BaseException) -> None:
+    """Raise exc in every command still awaiting a response"""
+    with self._lock:
+      for fut in (*self._pending.values(), *self._in_order):
+        if fut.set_running_or_notify_cancel(): fut.set_exception(exc)
+      self._pending.clear()
+      self._in_order.clear()
+
+class Actuator:
+  """A single actuator on the bus of a Communicator
+
+    Offers the commands of Communicator without the address argument. Obtain
+    instances with Communicator.actuator(addr), which precomputes the encoded
+    commands of the address. Commands go through the communicator, so they
+    are batched, pipelined or sent through io_uring the same way.
+
+    Attributes:
+      comm: communicator the actuator is connected to
+      addr: id of the actuator
+  """
+  __slots__ = ('comm', 'addr')
+
+  def __init__(self, comm: Communicator, addr: int) -> None:
+    """Constructor simply setting attributes"""
+    self.comm: Communicator = comm
+    self.addr: int = addr
+
+  def rotate_to_position(self, pos: float) -> str:
+    """Rotates the actuator to position given by pos, see Communicator"""
+    comm = self.comm
+    return comm._command(self.addr, SET_POS, comm._convert_pos(pos))
+
+  def rotate_at_velocity(self, vel: float) -> str:
+    """Rotates the actuator at velocity given by vel, see Communicator"""
+    comm = self.comm
+    return comm._command(self.addr, SET_VEL, comm._convert_vel(vel))
+
+  def rotate_at_current(self, cur: float) -> str:
+    """Rotates the actuator at current given by cur, see Communicator"""
+    return self.comm._command(self.addr, SET_CUR, cur)
+
+  def get_position(self) -> str:
+    """Returns the current position the actuator is at"""
+    return self.comm._command(self.addr, GET_POS)
+
+  def get_velocity(self) -> str:
+    """Returns the current velocity the actuator is rotating at"""
+    return self.comm._command(self.addr, GET_VEL)
+
+  def get_current(self) -> str:
+    """Returns the current the actuator is operating at"""
+    return self.comm._command(self.addr, GET_CUR)
+
+  def get_temperature(self) -> str:
+    """Returns the temperature the actuator is operating at"""
+    return self.comm._command(self.addr, GET_TMP)
 
 def main():
   print("\n*** Running main function ***\n")
@@ -176,16 +863,14 @@ def main():
     else:
       port = arg
 
-  comm = Communicator(port)
-
-  print(comm.rotate_at_velocity(1, 99.999))
-  print(comm.rotate_at_current(1, 50.0))
-  print(comm.rotate_to_position(1, 10000.023))
-  print(comm.get_velocity(1))
-  print(comm.get_position(1))
-  print(comm.get_current(1))
-  print(comm.get_temperature(1))
-  del comm
+  with Communicator(port) as comm:
+    print(comm.rotate_at_velocity(1, 99.999))
+    print(comm.rotate_at_current(1, 50.0))
+    print(comm.rotate_to_position(1, 10000.023))
+    print(comm.get_velocity(1))
+    print(comm.get_position(1))
+    print(comm.get_current(1))
+    print(comm.get_temperature(1))
 
 if __name__ == "__main__":
   main()
@@ -0,0 +1,204 @@
+import asyncio
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+import serial_asyncio
+
+from avolibrary import (DEFAULT_BAUDRATE, GET_CUR, GET_POS, GET_TMP, GET_VEL, SET_CUR, SET_POS, SET_VEL,
+  STOP_BYTE, PosUnit, Protocol, VelUnit, _FrameCodec)
+
+class AsyncCommunicator(_FrameCodec):
+  """asyncio counterpart of avolibrary.Communicator, requires pyserial-asyncio
+
+    Commands do not block the event loop and may be awaited concurrently, e.g.
+    with asyncio.gather, so several actuators can have a command in flight at
+    once. A single background task reads the responses and hands each to the
+    command it answers: by message id under Protocol.BINARY, by order under
+    Protocol.TEXT. Create instances with `await AsyncCommunicator.open(port)`.
+
+    Attributes:
+      reader: stream MCU responses are read from
+      writer: stream commands are written to
+      _pending: futures of commands awaiting a response, by message id
+      _in_order: futures of commands awaiting a response, in send order
+      _reader_task: background task resolving the futures
+  """
+  __slots__ = ('reader', 'writer', '_pending', '_in_order', '_reader_task')
+
+  def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, pos_unit: PosUnit = PosUnit.RADIANS, vel_unit: VelUnit = VelUnit.RPS, protocol: Protocol = Protocol.TEXT) -> None:
+    """Constructor simply setting attributes, use open() to connect to a port"""
+    super().__init__(pos_unit, vel_unit, protocol)
+    self.reader: asyncio.StreamReader = reader
+    self.writer: asyncio.StreamWriter = writer
+    self._pending: Dict[int, asyncio.Future] = {}
+    self._in_order: Deque[asyncio.Future] = deque()
+    self._reader_task: asyncio.Task = asyncio.ensure_future(self._read_responses())
+
+  @classmethod
+  async def open(cls, port_num: str, pos_unit: PosUnit = PosUnit.RADIANS, vel_unit: VelUnit = VelUnit.RPS, protocol: Protocol = Protocol.TEXT, baudrate: int = DEFAULT_BAUDRATE) -> 'AsyncCommunicator':
+    """Open a serial port and return a communicator using it
+
+      Args:
+        port_num: serial port, see avolibrary.Communicator
+        pos_unit: unit for position
+        vel_unit: unit for velocity
+        protocol: wire format used for commands, must match the MCU firmware
+        baudrate: serial baudrate, must match the MCU firmware
+
+      Returns:
+        the connected communicator
+    """
+    reader, writer = await serial_asyncio.open_serial_connection(url=port_num, baudrate=baudrate)
+    return cls(reader, writer, pos_unit, vel_unit, protocol)
+
+  async def close(self) -> None:
+    """Stop reading responses, fail outstanding commands and close the port"""
+    self._reader_task.cancel()
+    self._fail_pending(ConnectionError('communicator closed'))
+    self.writer.close()
+
+  async def __aenter__(self) -> 'AsyncCommunicator':
+    return self
+
+  async def __aexit__(self, *exc: Any) -> None:
+    await self.close()
+
+  async def rotate_to_position(self, addr: int, pos: float) -> str:
+    """Rotates actuator given by addr to postion given by pos
+
+      Args:
+        addr: id for specific actuator to rotate
+        pos: position specified in self.pos_unit units
+
+      Returns:
+        the response of the mcu
+    """
+    return await self._command(addr, SET_POS, self._convert_pos(pos))
+
+  async def rotate_at_velocity(self, addr: int, vel: float) -> str:
+    """Rotates actuator given by addr at velocity given by vel
+
+      Args:
+        addr: id for specific actuator to rotate
+        vel: velocity specified in self.vel_unit units
+
+      Returns:
+        the response of the mcu
+    """
+    return await self._command(addr, SET_VEL, self._convert_vel(vel))
+
+  async def rotate_at_current(self, addr: int, cur: float) -> str:
+    """Rotates actuator given by addr at current given by cur
+
+      Args:
+        addr: id for specific actuator to rotate
+        cur: current specified in amperes
+
+      Returns:
+        the response of the mcu
+    """
+    return await self._command(addr, SET_CUR, cur)
+
+  async def get_position(self, addr: int) -> str:
+    """Returns the current position the actuator is at
+
+      Args:
+        addr: id for specific actuator
+
+      Returns:
+        the response of the mcu
+    """
+    return await self._command(addr, GET_POS)
+
+  async def get_velocity(self, addr: int) -> str:
+    """Returns the current velocity the actuator is rotating at
+
+      Args:
+        addr: id for specific actuator
+
+      Returns:
+        the response of the mcu
+    """
+    return await self._command(addr, GET_VEL)
+
+  async def get_current(self, addr: int) -> str:
+    """Returns the current the actuator is operating at
+
+      Args:
+        addr: id for specific actuator
+
+      Returns:
+        the response of the mcu
+    """
+    return await self._command(addr, GET_CUR)
+
+  async def get_temperature(self, addr: int) -> str:
+    """Returns the temperature the actuator is operating at
+
+      Args:
+        addr: id for specific actuator
+
+      Returns:
+        the response of the mcu
+    """
+    return await self._command(addr, GET_TMP)
+
+  async def _command(self, addr: int, verb: bytes, value: Optional[float] = None) -> str:
+    """Send a command and wait for the response matched to it
+
+      Args:
+        addr: actuator id
+        verb: one of the pre-encoded command verbs (SET_POS, GET_VEL, ...)
+        value: value for setter verbs, None for getters
+
+      Returns:
+        the response of the mcu
+    """
+    if self._reader_task.done(): raise ConnectionError('communicator closed')
+
+    fut = asyncio.get_running_loop().create_future()
+    msgid = 0
+    if self.protocol == Protocol.BINARY:
+      msgid = self._next_msgid()
+      self._pending[msgid] = fut
+    else:
+      self._in_order.append(fut)
+
+    self.writer.write(self._encode_frame(addr, verb, value, msgid))
+    await self.writer.drain()
+    return await fut
+
+  async def _read_responses(self) -> None:
+    """Resolve the future of every command the MCU responds to
+
+      Responses to commands that were cancelled (e.g. by asyncio.wait_for) are
+      dropped so later responses still reach the right command. An undecodable
+      frame is dropped under Protocol.BINARY, where it cannot be matched to a
+      command, and otherwise fails the command it answers. Only errors of the
+      stream itself stop the task.
+    """
+    try:
+      while True:
+        frame = await self.reader.readuntil(STOP_BYTE.encode())
+        try:
+          msgid, response = self._decode_response(frame)
+        except ValueError as exc:
+          if self.protocol == Protocol.BINARY: continue
+          msgid, response = None, exc
+        if msgid is None:
+          fut = self._in_order.popleft() if self._in_order else None
+        else:
+          fut = self._pending.pop(msgid, None)
+        if fut is None or fut.done(): continue
+        if isinstance(response, Exception): fut.set_exception(response)
+        else: fut.set_result(response)
+    except asyncio.CancelledError:
+      raise
+    except Exception as exc:
+      self._fail_pending(exc)
+
+  def _fail_pending(self, exc: BaseException) -> None:
+    """Raise exc in every command still awaiting a response"""
+    for fut in (*self._pending.values(), *self._in_order):
+      if not fut.done(): fut.set_exception(exc)
+    self._pending.clear()
+    self._in_order.clear()
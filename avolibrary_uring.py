@@ -0,0 +1,277 @@
+import ctypes, errno, fcntl, mmap, os, struct
+from typing import Any, List, Optional, Tuple
+
+from avolibrary import DEFAULT_BAUDRATE, Communicator, PosUnit, Protocol, VelUnit
+
+URING_ENTRIES = 256
+RX_BUF_LEN = 4096
+TX_BUF_LEN = 4096
+
+# linux/io_uring.h, the syscall numbers are shared by all architectures
+_SYS_IO_URING_SETUP = 425
+_SYS_IO_URING_ENTER = 426
+_SYS_IO_URING_REGISTER = 427
+_IORING_OFF_SQ_RING = 0
+_IORING_OFF_CQ_RING = 0x8000000
+_IORING_OFF_SQES = 0x10000000
+_IORING_ENTER_GETEVENTS = 1
+_IORING_REGISTER_BUFFERS = 0
+_IORING_OP_READ_FIXED = 4
+_IORING_OP_WRITE_FIXED = 5
+_IORING_OP_LINK_TIMEOUT = 15
+_IORING_OP_WRITE = 23
+_IOSQE_IO_LINK = 1 << 2
+_MIN_KERNEL = (5, 6) # IORING_OP_WRITE
+# read results meaning nothing arrived: EOF, cancelled by the linked timeout
+# (or a broken link), or interrupted
+_NO_DATA = (0, -errno.ECANCELED, -errno.ETIME, -errno.EINTR, -errno.EAGAIN)
+
+_SQE = struct.Struct('<BBHiQQIIQH22x') # opcode, flags, ioprio, fd, off, addr, len, op_flags, user_data, buf_index
+_CQE = struct.Struct('<QiI') # user_data, res, flags
+_OFFSETS = struct.Struct('<7IxxxxQ') # io_sqring_offsets / io_cqring_offsets
+
+class _IoUringParams(ctypes.Structure):
+  _fields_ = [
+    ('sq_entries', ctypes.c_uint32), ('cq_entries', ctypes.c_uint32), ('flags', ctypes.c_uint32),
+    ('sq_thread_cpu', ctypes.c_uint32), ('sq_thread_idle', ctypes.c_uint32), ('features', ctypes.c_uint32),
+    ('wq_fd', ctypes.c_uint32), ('resv', ctypes.c_uint32 * 3),
+    ('sq_off', ctypes.c_uint8 * _OFFSETS.size), ('cq_off', ctypes.c_uint8 * _OFFSETS.size),
+  ]
+
+class _Timespec(ctypes.Structure):
+  _fields_ = [('tv_sec', ctypes.c_int64), ('tv_nsec', ctypes.c_int64)]
+
+class _Iovec(ctypes.Structure):
+  _fields_ = [('iov_base', ctypes.c_void_p), ('iov_len', ctypes.c_size_t)]
+
+_libc = ctypes.CDLL(None, use_errno=True)
+_libc.syscall.restype = ctypes.c_long
+
+def _syscall(*args: Any) -> int:
+  """Invoke a raw syscall, raising OSError on failure"""
+  ret = _libc.syscall(*args)
+  if ret < 0:
+    err = ctypes.get_errno()
+    raise OSError(err, os.strerror(err))
+  return ret
+
+class _IoUring:
+  """Minimal io_uring instance driving reads and writes on a single fd
+
+    Every call to submit() hands a chain of operations to the kernel and
+    collects all of their completions with one io_uring_enter.
+
+    Attributes:
+      fd: file descriptor the operations target
+      rx_buf: registered buffer reads land in (buffer index 0)
+      tx_buf: registered buffer frames are written from (buffer index 1),
+        reused by every write since submit() waits for completion
+      tx_view: writable byte view of tx_buf for packing frames in place
+  """
+  __slots__ = ('fd', '_ring_fd', '_sq_ring', '_cq_ring', '_sqes', '_sq_head', '_sq_tail', '_sq_mask', '_sq_array', '_cq_head', '_cq_tail', '_cq_mask', '_cqes', 'rx_buf', 'tx_buf', 'tx_view', '_timeout', '_seq')
+
+  def __init__(self, fd: int, entries: int = URING_ENTRIES) -> None:
+    """Set up the ring and register the I/O buffers, raises OSError if unsupported"""
+    self.fd: int = fd
+    params = _IoUringParams()
+    self._ring_fd: int = _syscall(_SYS_IO_URING_SETUP, entries, ctypes.byref(params))
+    try:
+      sq = _OFFSETS.unpack(bytes(params.sq_off))
+      cq = _OFFSETS.unpack(bytes(params.cq_off))
+      self._sq_ring = self._mmap(sq[6] + params.sq_entries * 4, _IORING_OFF_SQ_RING)
+      self._cq_ring = self._mmap(cq[5] + params.cq_entries * _CQE.size, _IORING_OFF_CQ_RING)
+      self._sqes = self._mmap(params.sq_entries * _SQE.size, _IORING_OFF_SQES)
+      self._sq_head = ctypes.c_uint32.from_buffer(self._sq_ring, sq[0])
+      self._sq_tail = ctypes.c_uint32.from_buffer(self._sq_ring, sq[1])
+      self._sq_mask: int = ctypes.c_uint32.from_buffer(self._sq_ring, sq[2]).value
+      self._sq_array: int = sq[6]
+      self._cq_head = ctypes.c_uint32.from_buffer(self._cq_ring, cq[0])
+      self._cq_tail = ctypes.c_uint32.from_buffer(self._cq_ring, cq[1])
+      self._cq_mask: int = ctypes.c_uint32.from_buffer(self._cq_ring, cq[2]).value
+      self._cqes: int = cq[5]
+
+      self.rx_buf = (ctypes.c_char * RX_BUF_LEN)()
+      self.tx_buf = (ctypes.c_char * TX_BUF_LEN)()
+      self.tx_view: memoryview = memoryview(self.tx_buf).cast('B')
+      iovs = (_Iovec * 2)(_Iovec(ctypes.addressof(self.rx_buf), RX_BUF_LEN), _Iovec(ctypes.addressof(self.tx_buf), TX_BUF_LEN))
+      _syscall(_SYS_IO_URING_REGISTER, self._ring_fd, _IORING_REGISTER_BUFFERS, iovs, 2)
+    except BaseException:
+      os.close(self._ring_fd)
+      raise
+    self._timeout = _Timespec()
+    self._seq: int = 0
+
+  def _mmap(self, length: int, offset: int) -> mmap.mmap:
+    return mmap.mmap(self._ring_fd, length, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE, offset=offset)
+
+  def close(self) -> None:
+    """Release the ring, the registered buffer is unregistered by the kernel"""
+    # ctypes views pin the mappings, drop them before unmapping
+    del self._sq_head, self._sq_tail, self._cq_head, self._cq_tail
+    for m in (self._sq_ring, self._cq_ring, self._sqes): m.close()
+    os.close(self._ring_fd)
+
+  def write_sqe(self, data: bytes, link: bool = False) -> Tuple:
+    """Operation writing data, which must stay referenced until submit() returns"""
+    addr = ctypes.cast(ctypes.c_char_p(data), ctypes.c_void_p).value
+    return (_IORING_OP_WRITE, _IOSQE_IO_LINK if link else 0, self.fd, addr, len(data), 0)
+
+  def write_fixed_sqe(self, length: int, link: bool = False) -> Tuple:
+    """Operation writing the first length bytes of tx_buf"""
+    return (_IORING_OP_WRITE_FIXED, _IOSQE_IO_LINK if link else 0, self.fd, ctypes.addressof(self.tx_buf), length, 1)
+
+  def read_sqe(self, link: bool = False) -> Tuple:
+    """Operation reading up to RX_BUF_LEN bytes into rx_buf"""
+    return (_IORING_OP_READ_FIXED, _IOSQE_IO_LINK if link else 0, self.fd, ctypes.addressof(self.rx_buf), RX_BUF_LEN, 0)
+
+  def timeout_sqe(self, timeout: float) -> Tuple:
+    """Operation cancelling the preceding linked operation after timeout seconds"""
+    self._timeout.tv_sec = int(timeout)
+    self._timeout.tv_nsec = int((timeout % 1) * 1e9)
+    return (_IORING_OP_LINK_TIMEOUT, 0, -1, ctypes.addressof(self._timeout), 1, 0)
+
+  def submit(self, *sqes: Tuple) -> List[int]:
+    """Submit a chain of operations and wait for all of them to complete
+
+      Args:
+        sqes: operations built by the *_sqe methods, linked operations only
+          start once the previous one completed successfully
+
+      Returns:
+        the result of every operation in order, negative errno on failure
+    """
+    # user_data carries a per-submit sequence number next to the operation's
+    # index, so completions left over from an earlier, aborted submit are
+    # never credited to this chain
+    self._seq = seq = (self._seq + 1) & 0xFFFFFFFF
+    tail = self._sq_tail.value
+    for i, (op, flags, fd, addr, length, buf_index) in enumerate(sqes):
+      slot = (tail + i) & self._sq_mask
+      _SQE.pack_into(self._sqes, slot * _SQE.size, op, flags, 0, fd, 0, addr, length, 0, seq << 16 | i, buf_index)
+      struct.pack_into('<I', self._sq_ring, self._sq_array + slot * 4, slot)
+    n = len(sqes)
+    end = (tail + n) & 0xFFFFFFFF
+    self._sq_tail.value = end
+
+    results: List[Optional[int]] = [None] * n
+    reaped = 0
+    while reaped < n:
+      # a signal ends the wait early (or, rarely, before submitting), so keep
+      # entering until every operation of the chain has completed
+      try:
+        _syscall(_SYS_IO_URING_ENTER, self._ring_fd, (end - self._sq_head.value) & 0xFFFFFFFF, n - reaped, _IORING_ENTER_GETEVENTS, None, 0)
+      except OSError as exc:
+        if exc.errno != errno.EINTR: raise
+
+      head = self._cq_head.value
+      while head != self._cq_tail.value:
+        user_data, res, _ = _CQE.unpack_from(self._cq_ring, self._cqes + (head & self._cq_mask) * _CQE.size)
+        i = user_data & 0xFFFF
+        if user_data >> 16 == seq and i < n and results[i] is None:
+          results[i] = res
+          reaped += 1
+        head = (head + 1) & 0xFFFFFFFF
+      self._cq_head.value = head
+    return results
+
+class UringCommunicator(Communicator):
+  """Linux-only Communicator doing its serial I/O through io_uring
+
+    pyserial still opens and configures the port, but reads and writes are
+    submitted to an io_uring instead of going through select/read/write. A
+    command and the read of its response are linked and submitted together,
+    so a round trip costs a single syscall. Falls back to plain pyserial I/O
+    when the kernel does not support io_uring (older than 5.6, disabled or
+    filtered).
+
+    Attributes:
+      _ring: the io_uring instance, None when falling back to pyserial
+  """
+  __slots__ = ('_ring',)
+
+  def __init__(self, port_num: str, pos_unit: PosUnit = PosUnit.RADIANS, vel_unit: VelUnit = VelUnit.RPS, protocol: Protocol = Protocol.TEXT, baudrate: Optional[int] = DEFAULT_BAUDRATE) -> None:
+    """Constructor opening the port and setting up the ring"""
+    super().__init__(port_num, pos_unit, vel_unit, protocol, baudrate)
+    self._ring: Optional[_IoUring] = None
+    if _kernel_version() < _MIN_KERNEL: return
+
+    try:
+      self._ring = _IoUring(self.ser.fd)
+    except OSError:
+      return
+    # reads block in the kernel and are bounded by a linked timeout instead of
+    # pyserial's select loop
+    try:
+      flags = fcntl.fcntl(self.ser.fd, fcntl.F_GETFL)
+      fcntl.fcntl(self.ser.fd, fcntl.F_SETFL, flags & ~os.O_NONBLOCK)
+    except BaseException:
+      # no finalizer would release the ring and port of a half built instance
+      self.close()
+      raise
+
+  def close(self) -> None:
+    """Release the ring and close the serial port"""
+    if self._ring is not None:
+      self._ring.close()
+      self._ring = None
+    super().close()
+
+  def _command(self, addr: int, verb: bytes, value: Optional[float] = None) -> Optional[str]:
+    """Send a command and read its response with a single io_uring_enter"""
+    if self._ring is None or self._batching: return super()._command(addr, verb, value)
+
+    ring = self._ring
+    msgid = self._next_msgid() if self.protocol == Protocol.BINARY else 0
+    length = self._encode_frame_into(ring.tx_view, addr, verb, value, msgid)
+    written, n = ring.submit(ring.write_fixed_sqe(length, link=True), *self._read_sqes())[:2]
+    if written < 0: raise OSError(-written, os.strerror(-written))
+    if n > 0: self._rx_buf += ring.rx_buf[:n]
+    elif n not in _NO_DATA: raise OSError(-n, os.strerror(-n))
+
+    if written < length:
+      # a short write breaks the link, so the read was cancelled without waiting
+      self._write(ring.tx_view[written:length].tobytes())
+    elif n <= 0 and not self._rx_buf:
+      return '' # timed out, don't wait a second time
+    return self._read_from_mcu(msgid)
+
+  def _write(self, data: bytes) -> None:
+    """Write raw bytes to the serial port"""
+    if self._ring is None: return super()._write(data)
+
+    ring = self._ring
+    if len(data) <= TX_BUF_LEN:
+      ring.tx_view[:len(data)] = data
+      n, = ring.submit(ring.write_fixed_sqe(len(data)))
+      if n < 0: raise OSError(-n, os.strerror(-n))
+      data = data[n:]
+
+    data = bytes(data)
+    while data:
+      n, = ring.submit(ring.write_sqe(data))
+      if n < 0: raise OSError(-n, os.strerror(-n))
+      data = data[n:]
+
+  def _read_available(self) -> bytes:
+    """Read whatever the OS has buffered, waiting up to the timeout for a byte"""
+    if self._ring is None: return super()._read_available()
+
+    ring = self._ring
+    n = ring.submit(*self._read_sqes())[0]
+    if n > 0: return ring.rx_buf[:n]
+    if n in _NO_DATA: return b''
+    raise OSError(-n, os.strerror(-n))
+
+  def _read_sqes(self) -> List[Tuple]:
+    """Operations reading into rx_buf, bounded by the serial timeout unless it is None"""
+    ring = self._ring
+    if self.ser.timeout is None: return [ring.read_sqe()]
+    return [ring.read_sqe(link=True), ring.timeout_sqe(self.ser.timeout)]
+
+def _kernel_version() -> Tuple[int, int]:
+  """Returns the (major, minor) version of the running kernel"""
+  release = os.uname().release.split('.')
+  try:
+    return int(release[0]), int(release[1].split('-')[0])
+  except (IndexError, ValueError):
+    return (0, 0)
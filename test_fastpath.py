@@ -0,0 +1,72 @@
+"""Checks the compiled encoders of _fastpath against the struct based ones
+
+Run with `python -m unittest test_fastpath` after `cythonize -i _fastpath.pyx`,
+skipped when the extension is not built.
+"""
+import importlib.util, os, random, struct, sys, unittest
+
+try:
+  import _fastpath
+except ImportError:
+  _fastpath = None
+
+def _load_struct_encoders():
+  """Import avolibrary as if _fastpath was not built, keeping its fallbacks"""
+  saved = sys.modules.get('_fastpath')
+  sys.modules['_fastpath'] = None # makes `from _fastpath import ...` raise ImportError
+  try:
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'avolibrary.py')
+    spec = importlib.util.spec_from_file_location('_avolibrary_struct', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+  finally:
+    if saved is None: del sys.modules['_fastpath']
+    else: sys.modules['_fastpath'] = saved
+  return module
+
+@unittest.skipIf(_fastpath is None, '_fastpath is not built')
+class FastpathTest(unittest.TestCase):
+  @classmethod
+  def setUpClass(cls):
+    cls.avo = _load_struct_encoders()
+    assert cls.avo._encode_binary.__module__ == '_avolibrary_struct'
+
+  def assert_same(self, *args):
+    """Both binary or both compact encoders agree on args, including on errors"""
+    fast, slow = (_fastpath.encode_binary, self.avo._encode_binary) if len(args) == 4 else (_fastpath.encode_compact, self.avo._encode_compact)
+    try:
+      expected = slow(*args)
+    except (struct.error, OverflowError) as exc:
+      with self.assertRaises(type(exc)):
+        fast(*args)
+    else:
+      self.assertEqual(fast(*args), expected, args)
+
+  def test_random_frames(self):
+    rng = random.Random(0)
+    for _ in range(20000):
+      value = rng.uniform(-1e6, 1e6)
+      self.assert_same(rng.randrange(256), rng.randrange(0x10000), rng.randrange(16), value)
+      self.assert_same(rng.randrange(256), rng.randrange(16), value)
+
+  def test_every_header_byte(self):
+    # every value of the first frame byte, which covers each CRC table entry
+    for b in range(256):
+      self.assert_same(b, 0, b, 1.5)
+      self.assert_same(b, b >> 4, 1.5)
+      self.assert_same(b >> 4, b & 0xF, 1.5)
+
+  def test_float_edge_cases(self):
+    for value in (0.0, -0.0, 1e-50, 3.4028235e38, -3.4028235e38, 3.4028236e38, 1e39, -1e39, float('inf'), float('-inf')):
+      self.assert_same(1, 2, 3, value)
+      self.assert_same(1, 3, value)
+      self.assert_same(30, 3, value)
+
+  def test_range_errors(self):
+    for addr, msgid, opcode in ((256, 0, 1), (-1, 0, 1), (1, 0x10000, 1), (1, -1, 1), (1, 0, 256), (1, 0, -1)):
+      self.assert_same(addr, msgid, opcode, 0.0)
+    for addr, opcode in ((256, 1), (-1, 1), (1, 256), (1, -1)):
+      self.assert_same(addr, opcode, 0.0)
+
+if __name__ == '__main__':
+  unittest.main()